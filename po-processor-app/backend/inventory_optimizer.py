@@ -40,8 +40,14 @@ class InventoryOptimizer:
         # But safest is to use 'Int64' nullable int or just standard int if we are sure.
         # Let's handle safe conversion
         line_details['store_id'] = pd.to_numeric(line_details['store_id'], errors='coerce').fillna(0).astype(int)
+
+        # flag_reason receives free-form strings below; a categorical column
+        # (set by the frontend for display speed) would reject new values
+        if 'flag_reason' in line_details.columns and isinstance(line_details['flag_reason'].dtype, pd.CategoricalDtype):
+            line_details['flag_reason'] = line_details['flag_reason'].astype(object)
         
-        # Merge Historical Sales (Avg)
+        # Normalize the external frames to the app schema up front
+        hist_merge = None
         if not historical_sales.empty:
             # Client now returns: internal_reference, store_id, avg_monthly_sales
             cols_to_rename = {'avg_monthly_sales': 'hist_avg_sales'}
@@ -54,6 +60,30 @@ class InventoryOptimizer:
             hist_merge['internal_reference'] = hist_merge['internal_reference'].astype(str)
             hist_merge['store_id'] = hist_merge['store_id'].astype(int)
 
+        inv_merge = None
+        if not store_inventory.empty:
+            # Client now returns: internal_reference, store_id, store_on_hand
+            cols_to_rename = {'quantity': 'store_on_hand'}
+            if 'product_id' in store_inventory.columns:
+                cols_to_rename['product_id'] = 'internal_reference'
+
+            inv_merge = store_inventory.rename(columns=cols_to_rename)
+
+            # Ensure type consistency before merge
+            inv_merge['internal_reference'] = inv_merge['internal_reference'].astype(str)
+            inv_merge['store_id'] = inv_merge['store_id'].astype(int)
+
+        # Factorize the string reference keys into one shared integer code
+        # space, so the joins below probe (int, int) tuples instead of
+        # hashing arbitrary-length strings on both sides of each merge.
+        ref_frames = [line_details] + [f for f in (hist_merge, inv_merge) if f is not None]
+        ref_uniques = pd.concat([f['internal_reference'] for f in ref_frames]).unique()
+        for frame in ref_frames:
+            frame['ref_code'] = pd.Categorical(frame['internal_reference'],
+                                               categories=ref_uniques).codes
+
+        # Merge Historical Sales (Avg)
+        if hist_merge is not None:
             # Drop existing column to avoid suffixing (_x, _y)
             if 'hist_avg_sales' in line_details.columns:
                 line_details = line_details.drop(columns=['hist_avg_sales'])
@@ -61,8 +91,8 @@ class InventoryOptimizer:
             logger.info(f"Merging historical sales: {len(hist_merge)} rows")
             line_details = pd.merge(
                 line_details,
-                hist_merge[['internal_reference', 'store_id', 'hist_avg_sales']],
-                on=['internal_reference', 'store_id'],
+                hist_merge[['ref_code', 'store_id', 'hist_avg_sales']],
+                on=['ref_code', 'store_id'],
                 how='left'
             )
         else:
@@ -71,18 +101,7 @@ class InventoryOptimizer:
                 line_details['hist_avg_sales'] = 0
 
         # Merge Store Inventory
-        if not store_inventory.empty:
-            # Client now returns: internal_reference, store_id, store_on_hand
-            cols_to_rename = {'quantity': 'store_on_hand'}
-            if 'product_id' in store_inventory.columns:
-                cols_to_rename['product_id'] = 'internal_reference'
-
-            inv_merge = store_inventory.rename(columns=cols_to_rename)
-
-            # Ensure type consistency before merge
-            inv_merge['internal_reference'] = inv_merge['internal_reference'].astype(str)
-            inv_merge['store_id'] = inv_merge['store_id'].astype(int)
-
+        if inv_merge is not None:
             # Drop existing column to avoid suffixing
             if 'store_on_hand' in line_details.columns:
                 line_details = line_details.drop(columns=['store_on_hand'])
@@ -90,15 +109,18 @@ class InventoryOptimizer:
             logger.info(f"Merging store inventory: {len(inv_merge)} rows")
             line_details = pd.merge(
                 line_details,
-                inv_merge[['internal_reference', 'store_id', 'store_on_hand']],
-                on=['internal_reference', 'store_id'],
+                inv_merge[['ref_code', 'store_id', 'store_on_hand']],
+                on=['ref_code', 'store_id'],
                 how='left'
             )
         else:
              # Ensure column exists if not merging
             if 'store_on_hand' not in line_details.columns:
                 line_details['store_on_hand'] = 0
-            
+
+        # The code column was only a merge key
+        line_details = line_details.drop(columns=['ref_code'])
+
         # Fill NaNs
         line_details['hist_avg_sales'] = line_details['hist_avg_sales'].fillna(0)
         line_details['store_on_hand'] = line_details['store_on_hand'].fillna(0) # Treat missing as 0 (or unknown)
@@ -1,27 +1,47 @@
 import pdfplumber
 import re
+import os
 import pandas as pd
 import logging
-from typing import List, Dict, Any, Tuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import List, Dict, Any, Callable, Optional, Tuple
 from io import BytesIO
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Required fields checked in validate_po_data (module-level so the tuple is
+# built once, not per item)
+_REQUIRED_PO_FIELDS = ('PO No.', 'Store ID', 'Internal Reference')
+
+
+def _has_required_fields(item: Dict[str, Any]) -> bool:
+    """Check required fields are present and non-blank without allocating
+    stripped copies or str() conversions for values that are already strings."""
+    for field in _REQUIRED_PO_FIELDS:
+        value = item.get(field)
+        if not value:
+            return False
+        if type(value) is str:
+            if not value.strip():
+                return False
+        elif not str(value).strip():
+            return False
+    return True
+
+
 class PDFExtractor:
     @staticmethod
     def validate_po_data(data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """Validate and clean extracted purchase order data"""
         if not data:
             return []
-        
+
         valid_data = []
-        required_fields = ['PO No.', 'Store ID', 'Internal Reference']
-        
+
         for item in data:
-            # Check required fields are present and not empty
-            if all(item.get(field) and str(item.get(field)).strip() for field in required_fields):
+            if _has_required_fields(item):
                 # Validate numeric fields
                 try:
                     qty = float(item.get('# of Order', 0))
@@ -63,25 +83,36 @@ class PDFExtractor:
                         
                         for line_num, line in enumerate(lines, 1):
                             try:
-                                line = line.strip()
+                                # Only pay for strip() when there is actually
+                                # whitespace to remove (rare after split('\n'))
+                                if line and (line[0] == ' ' or line[-1] == ' '):
+                                    line = line.strip()
                                 if not line:
                                     continue
-                                
+
+                                # Cheap keyword prefilter: skip the 4 header
+                                # regexes for lines that can't possibly match
+                                low = line.lower()
+                                is_item_line = line[0].isdigit()
+                                if not is_item_line and 'po no' not in low and 'store' not in low and 'date' not in low:
+                                    continue
+
                                 # Extract PO Number
-                                if po_match := re.search(r'PO\s*No\.?\s*:?\s*(\d+)', line, re.IGNORECASE):
+                                if 'po no' in low and (po_match := re.search(r'PO\s*No\.?\s*:?\s*(\d+)', line, re.IGNORECASE)):
                                     current_po['PO No.'] = po_match.group(1)
-                                
+
                                 # Extract Store Name and Store ID
-                                if store_match := re.search(r'Store\s*:?\s*(.*?)\s*-\s*(\d{3})\b', line, re.IGNORECASE):
+                                if 'store' in low and (store_match := re.search(r'Store\s*:?\s*(.*?)\s*-\s*(\d{3})\b', line, re.IGNORECASE)):
                                     current_po['Store Name'] = store_match.group(1).strip()
                                     current_po['Store ID'] = store_match.group(2)
-                                
+
                                 # Extract Dates
-                                if order_date_match := re.search(r'Order\s*Date\s*:?\s*(\d{1,2}/\d{1,2}/\d{4})', line, re.IGNORECASE):
-                                    current_po['Order Date'] = order_date_match.group(1)
-                                
-                                if delivery_date_match := re.search(r'Delivery\s*Date.*?:?\s*(\d{1,2}/\d{1,2}/\d{4})', line, re.IGNORECASE):
-                                    current_po['Delivery Date'] = delivery_date_match.group(1)
+                                if 'date' in low:
+                                    if order_date_match := re.search(r'Order\s*Date\s*:?\s*(\d{1,2}/\d{1,2}/\d{4})', line, re.IGNORECASE):
+                                        current_po['Order Date'] = order_date_match.group(1)
+
+                                    if delivery_date_match := re.search(r'Delivery\s*Date.*?:?\s*(\d{1,2}/\d{1,2}/\d{4})', line, re.IGNORECASE):
+                                        current_po['Delivery Date'] = delivery_date_match.group(1)
                                 
                                 # Parse item lines - Pattern: Starts with 6 digits (Internal Reference)
                                 if 'PO No.' in current_po and re.match(r'^\d{6}\b', line):
@@ -181,28 +212,105 @@ class PDFExtractor:
             
         return valid_data, errors
 
+    @staticmethod
+    def extract_from_bytes(data: bytes, filename: str) -> Tuple[List[Dict[str, Any]], List[str]]:
+        """Extract from raw PDF bytes (picklable entry point for worker processes)"""
+        return PDFExtractor.extract_from_file(BytesIO(data), filename)
+
+    @staticmethod
+    def extract_from_path(path: str, filename: str) -> Tuple[List[Dict[str, Any]], List[str]]:
+        """Extract from a PDF on disk. Workers open the file themselves, so
+        only the path crosses the process boundary - no pickled PDF bytes."""
+        with open(path, 'rb') as f:
+            return PDFExtractor.extract_from_file(f, filename)
+
+    @staticmethod
+    def _build_dataframe(all_data: List[Dict[str, Any]]) -> pd.DataFrame:
+        """Build the combined result DataFrame with cleaned types and sorting"""
+        if not all_data:
+            return pd.DataFrame()
+
+        df = pd.DataFrame(all_data)
+
+        # Clean up types
+        df['Store ID'] = pd.to_numeric(df['Store ID'], errors='coerce')
+        df['PO No.'] = pd.to_numeric(df['PO No.'], errors='coerce')
+
+        # Sort
+        df = df.sort_values(by=['Store ID', 'PO No.'])
+
+        return df
+
     @staticmethod
     def process_multiple_pdfs(files: List[Tuple[BytesIO, str]]) -> Tuple[pd.DataFrame, List[str]]:
         """Process a list of (file_content, filename) tuples"""
         all_data = []
         all_errors = []
-        
+
         for file_content, filename in files:
             data, errors = PDFExtractor.extract_from_file(file_content, filename)
             all_data.extend(data)
             all_errors.extend(errors)
-            
-        if not all_data:
-            return pd.DataFrame(), all_errors
-            
-        df = pd.DataFrame(all_data)
-        
-        # Clean up types
-        if not df.empty:
-            df['Store ID'] = pd.to_numeric(df['Store ID'], errors='coerce')
-            df['PO No.'] = pd.to_numeric(df['PO No.'], errors='coerce')
-            
-            # Sort
-            df = df.sort_values(by=['Store ID', 'PO No.'])
-            
-        return df, all_errors
+
+        return PDFExtractor._build_dataframe(all_data), all_errors
+
+    @staticmethod
+    def _run_parallel(files: List[Tuple[Any, str]],
+                      extract_fn: Callable[[Any, str], Tuple[List[Dict[str, Any]], List[str]]],
+                      progress_callback: Optional[Callable[[int, int], None]] = None) -> Tuple[pd.DataFrame, List[str]]:
+        """
+        Run extract_fn over (payload, filename) tuples across worker processes.
+
+        PDF parsing is CPU-bound and independent per file, so each file is
+        dispatched to a ProcessPoolExecutor sized to the CPU count.
+        progress_callback, if given, is called with (completed, total) as
+        each file finishes.
+        """
+        all_data = []
+        all_errors = []
+        total = len(files)
+
+        if total <= 1:
+            # Not worth paying process startup for a single file
+            for payload, filename in files:
+                data, errors = extract_fn(payload, filename)
+                all_data.extend(data)
+                all_errors.extend(errors)
+                if progress_callback:
+                    progress_callback(1, total)
+            return PDFExtractor._build_dataframe(all_data), all_errors
+
+        max_workers = min(total, os.cpu_count() or 1)
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                executor.submit(extract_fn, payload, filename): filename
+                for payload, filename in files
+            }
+            completed = 0
+            for future in as_completed(futures):
+                filename = futures[future]
+                try:
+                    data, errors = future.result()
+                    all_data.extend(data)
+                    all_errors.extend(errors)
+                except Exception as e:
+                    all_errors.append(f"Error processing {filename}: {str(e)}")
+                completed += 1
+                if progress_callback:
+                    progress_callback(completed, total)
+
+        return PDFExtractor._build_dataframe(all_data), all_errors
+
+    @staticmethod
+    def process_pdfs_parallel(files: List[Tuple[bytes, str]],
+                              progress_callback: Optional[Callable[[int, int], None]] = None) -> Tuple[pd.DataFrame, List[str]]:
+        """Process a list of (pdf_bytes, filename) tuples across worker processes"""
+        return PDFExtractor._run_parallel(files, PDFExtractor.extract_from_bytes, progress_callback)
+
+    @staticmethod
+    def process_pdf_paths_parallel(files: List[Tuple[str, str]],
+                                   progress_callback: Optional[Callable[[int, int], None]] = None) -> Tuple[pd.DataFrame, List[str]]:
+        """Process a list of (pdf_path, filename) tuples across worker processes.
+        Preferred over the bytes variant for large uploads: the parent never
+        holds PDF contents in memory and workers read straight from disk."""
+        return PDFExtractor._run_parallel(files, PDFExtractor.extract_from_path, progress_callback)
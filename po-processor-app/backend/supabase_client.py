@@ -1,5 +1,8 @@
 from supabase import create_client, Client
+import functools
+import httpx
 import os
+import numpy as np
 import pandas as pd
 import logging
 from typing import Dict, Any, List
@@ -8,6 +11,45 @@ from typing import Dict, Any, List
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# PostgREST encodes in_() filters into the request URL, so very long value
+# lists (real POs can carry hundreds of SKUs) risk URL-length limits and
+# degraded query plans. Filters are batched at this size instead.
+_IN_CHUNK_SIZE = 200
+
+# Decode response bodies with orjson when it is installed. JSON parsing
+# dominates large sales_performance/inventory_snapshots fetches, and the
+# postgrest client reads every body through httpx.Response.json(), so the
+# hook lives there. Callers passing stdlib-specific kwargs still get the
+# original decoder.
+try:
+    import orjson
+
+    _stdlib_response_json = httpx.Response.json
+
+    def _orjson_response_json(self, **kwargs):
+        if kwargs:
+            return _stdlib_response_json(self, **kwargs)
+        return orjson.loads(self.content)
+
+    httpx.Response.json = _orjson_response_json
+except ImportError:
+    pass  # optional speed-up only
+
+
+def _map_ids(values: pd.Series, mapping: Dict[int, Any]) -> np.ndarray:
+    """
+    Vectorized replacement for Series.map(dict) on integer keys.
+    Builds a sorted key array once and translates the whole column with
+    numpy searchsorted instead of a Python dict lookup per row.
+    All values are guaranteed present in the mapping because the rows were
+    fetched with .in_(mapping keys).
+    """
+    keys = np.fromiter(mapping.keys(), dtype=np.int64, count=len(mapping))
+    vals = np.array(list(mapping.values()))
+    order = keys.argsort()
+    idx = np.searchsorted(keys[order], values.to_numpy(dtype=np.int64))
+    return vals[order][idx]
+
 class SupabaseClient:
     def __init__(self, url: str, key: str):
         self.url = url
@@ -18,32 +60,77 @@ class SupabaseClient:
         """Initialize Supabase client"""
         try:
             self.client = create_client(self.url, self.key)
+            self._configure_connection_pool()
+            # Drop any ID maps cached against a previous connection
+            self._fetch_product_id_map.cache_clear()
+            self._fetch_store_id_map.cache_clear()
             logger.info("Supabase client initialized")
             return True
         except Exception as e:
             logger.error(f"Supabase connection error: {e}")
             return False
 
+    def _configure_connection_pool(self):
+        """
+        Replace the default postgrest HTTP session with one that has a bounded
+        keep-alive pool, so concurrent fetches (products/stores/sales/inventory)
+        reuse sockets instead of paying TCP setup per call.
+        """
+        try:
+            old_session = self.client.postgrest.session
+            self.client.postgrest.session = httpx.Client(
+                base_url=old_session.base_url,
+                headers=old_session.headers,
+                limits=httpx.Limits(max_keepalive_connections=20, max_connections=50),
+                timeout=30
+            )
+        except Exception as e:
+            # Non-fatal: fall back to the library's default session
+            logger.warning(f"Could not configure connection pool: {e}")
+
+    def _fetch_in_chunks(self, table: str, select_cols: str, col: str,
+                         values: List, extra_in: tuple = None) -> List[Dict]:
+        """
+        Run a .in_(col, values) query in batches of _IN_CHUNK_SIZE and
+        concatenate the rows. extra_in optionally adds a second (column,
+        values) filter applied to every batch.
+        """
+        rows = []
+        for i in range(0, len(values), _IN_CHUNK_SIZE):
+            query = self.client.table(table)\
+                .select(select_cols)\
+                .in_(col, values[i:i + _IN_CHUNK_SIZE])
+            if extra_in:
+                query = query.in_(*extra_in)
+            response = query.execute()
+            if response.data:
+                rows.extend(response.data)
+        return rows
+
 
             
     def _get_product_id_map(self, skus: List[str]) -> Dict[int, str]:
         """
         Helper: Map Internal ID (int) -> SKU (str)
-        Query 'products' table where item_id IN skus
+        Query 'products' table where item_id IN skus.
+        Results are cached per SKU set, so get_historical_sales and
+        get_store_inventory share one products query instead of two.
         """
-        if not skus: return {}
+        # len() rather than truthiness so numpy arrays work as input
+        if len(skus) == 0: return {}
+        return self._fetch_product_id_map(frozenset(str(s) for s in skus))
+
+    @functools.lru_cache(maxsize=128)
+    def _fetch_product_id_map(self, skus: frozenset) -> Dict[int, str]:
         try:
             # item_id is the SKU in Supabase products table
-            response = self.client.table('products')\
-                .select('id, item_id')\
-                .in_('item_id', skus)\
-                .execute()
-            
-            if not response.data:
+            rows = self._fetch_in_chunks('products', 'id, item_id', 'item_id', sorted(skus))
+
+            if not rows:
                 return {}
-                
+
             # Return map: internal_id (int) -> item_id (str)
-            return {row['id']: str(row['item_id']) for row in response.data}
+            return {row['id']: str(row['item_id']) for row in rows}
         except Exception as e:
             logger.error(f"Error fetching product map: {e}")
             return {}
@@ -51,21 +138,24 @@ class SupabaseClient:
     def _get_store_id_map(self, store_numbers: List[int]) -> Dict[int, int]:
         """
         Helper: Map Internal ID (int) -> Store Number (int)
-        Query 'stores' table where store_number IN store_numbers
+        Query 'stores' table where store_number IN store_numbers.
+        Cached per store set (see _get_product_id_map).
         """
-        if not store_numbers: return {}
+        if len(store_numbers) == 0: return {}
+        return self._fetch_store_id_map(frozenset(int(s) for s in store_numbers))
+
+    @functools.lru_cache(maxsize=128)
+    def _fetch_store_id_map(self, store_numbers: frozenset) -> Dict[int, int]:
         try:
             # store_number is the External ID in Supabase stores table
-            response = self.client.table('stores')\
-                .select('id, store_number')\
-                .in_('store_number', store_numbers)\
-                .execute()
-            
-            if not response.data:
+            rows = self._fetch_in_chunks('stores', 'id, store_number',
+                                         'store_number', sorted(store_numbers))
+
+            if not rows:
                 return {}
-            
+
             # Return map: internal_id (int) -> store_number (int)
-            return {row['id']: int(row['store_number']) for row in response.data}
+            return {row['id']: int(row['store_number']) for row in rows}
         except Exception as e:
             logger.error(f"Error fetching store map: {e}")
             return {}
@@ -91,21 +181,19 @@ class SupabaseClient:
             internal_store_ids = list(store_map.keys())
 
             # 2. Fetch Sales Performance using Internal IDs
-            response = self.client.table('sales_performance')\
-                .select('*')\
-                .in_('store_id', internal_store_ids)\
-                .in_('product_id', internal_product_ids)\
-                .execute()
-                
-            data = response.data
+            # (chunked over product ids - the store list stays short)
+            data = self._fetch_in_chunks(
+                'sales_performance', '*', 'product_id', internal_product_ids,
+                extra_in=('store_id', internal_store_ids))
+
             if not data:
                 return pd.DataFrame()
                 
             df = pd.DataFrame(data)
             
             # 3. Map Internal IDs back to External Keys for the App
-            df['sku'] = df['product_id'].map(product_map)
-            df['store_number'] = df['store_id'].map(store_map)
+            df['sku'] = _map_ids(df['product_id'], product_map)
+            df['store_number'] = _map_ids(df['store_id'], store_map)
             
             # 4. Calculate Average
             # Group by SKU (mapped) and store_number (mapped)
@@ -148,29 +236,40 @@ class SupabaseClient:
             internal_product_ids = list(product_map.keys())
             internal_store_ids = list(store_map.keys())
 
-            # 2. Fetch Snapshots
-            response = self.client.table('inventory_snapshots')\
-                .select('*')\
-                .in_('store_id', internal_store_ids)\
-                .in_('product_id', internal_product_ids)\
-                .execute()
-                
-            data = response.data
-            if not data:
+            # 2. Fetch Latest Snapshots
+            # Aggregation happens server-side (DISTINCT ON in the latest_inventory
+            # SQL function - see deployment/migrations/004) so we only transfer
+            # one row per (store, product) instead of every historical snapshot.
+            df = None
+            try:
+                response = self.client.rpc('latest_inventory', {
+                    'store_ids': internal_store_ids,
+                    'product_ids': internal_product_ids
+                }).execute()
+                if response.data:
+                    df = pd.DataFrame(response.data)
+            except Exception as rpc_error:
+                # Fallback for databases where the migration hasn't been run
+                # yet: fetch the full history and keep the newest row per
+                # (store, product) via a per-group idxmax - no sort of the
+                # whole frame and no records round-trip
+                logger.warning(f"latest_inventory RPC unavailable, falling back to client-side dedup: {rpc_error}")
+                data = self._fetch_in_chunks(
+                    'inventory_snapshots', '*', 'product_id', internal_product_ids,
+                    extra_in=('store_id', internal_store_ids))
+                if data:
+                    df = pd.DataFrame(data)
+                    latest_idx = df.groupby(['store_id', 'product_id'])['snapshot_date'].idxmax()
+                    df = df.loc[latest_idx]
+
+            if df is None or df.empty:
                 return pd.DataFrame()
-                
-            df = pd.DataFrame(data)
-            
+
             # 3. Map back to External Keys
-            df['sku'] = df['product_id'].map(product_map)
-            df['store_number'] = df['store_id'].map(store_map)
-            
-            # 4. Get Latest
-            df['snapshot_date'] = pd.to_datetime(df['snapshot_date'])
-            latest_inventory = df.sort_values('snapshot_date', ascending=False)\
-                .drop_duplicates(subset=['sku', 'store_number'])
-            
-            result = latest_inventory[['sku', 'store_number', 'quantity']].copy()
+            df['sku'] = _map_ids(df['product_id'], product_map)
+            df['store_number'] = _map_ids(df['store_id'], store_map)
+
+            result = df[['sku', 'store_number', 'quantity']].copy()
             result.rename(columns={
                 'sku': 'internal_reference',
                 'store_number': 'store_id',
@@ -0,0 +1,33 @@
+-- Migration: Create latest_inventory RPC function
+-- Description: Returns the most recent inventory snapshot per (store, product)
+--              so the app no longer has to download every snapshot and
+--              deduplicate client-side
+-- Run this migration after 003_enable_rls.sql in Supabase SQL Editor
+
+CREATE OR REPLACE FUNCTION public.latest_inventory(
+  store_ids INT[],
+  product_ids INT[]
+)
+RETURNS TABLE (
+  store_id INT,
+  product_id INT,
+  quantity NUMERIC,
+  snapshot_date DATE
+)
+LANGUAGE sql
+STABLE
+AS $$
+  SELECT DISTINCT ON (s.store_id, s.product_id)
+    s.store_id,
+    s.product_id,
+    s.quantity,
+    s.snapshot_date
+  FROM public.inventory_snapshots s
+  WHERE s.store_id = ANY(store_ids)
+    AND s.product_id = ANY(product_ids)
+  ORDER BY s.store_id, s.product_id, s.snapshot_date DESC;
+$$;
+
+-- Supporting index so DISTINCT ON resolves without a full sort
+CREATE INDEX IF NOT EXISTS idx_inventory_snapshots_latest
+  ON public.inventory_snapshots(store_id, product_id, snapshot_date DESC);
@@ -0,0 +1,42 @@
+-- Migration: Create debug_po_match RPC function
+-- Description: Returns the four debug resultsets (products, stores, sales,
+--              inventory) for a set of SKUs and store numbers in a single
+--              round-trip, replacing four sequential queries from the
+--              debug tooling
+-- Run this migration after 004_latest_inventory_function.sql in Supabase SQL Editor
+
+CREATE OR REPLACE FUNCTION public.debug_po_match(
+  skus TEXT[],
+  stores INT[]
+)
+RETURNS JSON
+LANGUAGE sql
+STABLE
+AS $$
+  SELECT json_build_object(
+    'products', (
+      SELECT COALESCE(json_agg(json_build_object('id', p.id, 'item_id', p.item_id)), '[]'::json)
+      FROM public.products p
+      WHERE p.item_id = ANY(skus)
+    ),
+    'stores', (
+      SELECT COALESCE(json_agg(json_build_object('id', s.id, 'store_number', s.store_number)), '[]'::json)
+      FROM public.stores s
+      WHERE s.store_number = ANY(stores)
+    ),
+    'sales', (
+      SELECT COALESCE(json_agg(row_to_json(sp)), '[]'::json)
+      FROM public.sales_performance sp
+      -- stores must be aliased: an unaliased range variable would make the
+      -- bare identifier "stores" ambiguous with the function parameter
+      WHERE sp.product_id IN (SELECT p2.id FROM public.products p2 WHERE p2.item_id = ANY(skus))
+        AND sp.store_id IN (SELECT s2.id FROM public.stores s2 WHERE s2.store_number = ANY(stores))
+    ),
+    'inventory', (
+      SELECT COALESCE(json_agg(row_to_json(inv)), '[]'::json)
+      FROM public.inventory_snapshots inv
+      WHERE inv.product_id IN (SELECT p3.id FROM public.products p3 WHERE p3.item_id = ANY(skus))
+        AND inv.store_id IN (SELECT s3.id FROM public.stores s3 WHERE s3.store_number = ANY(stores))
+    )
+  );
+$$;
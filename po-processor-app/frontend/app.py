@@ -1,8 +1,12 @@
 import streamlit as st
+import numpy as np
 import pandas as pd
 import yaml
 import os
+import shutil
 import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from dotenv import load_dotenv
 
@@ -38,6 +42,128 @@ def load_settings():
 
 settings = load_settings()
 
+# Arrow-backed string dtype: st.dataframe/st.data_editor serialize frames to
+# Arrow on every render, and object-dtype strings pay a per-cell conversion
+try:
+    import pyarrow as pa
+    ARROW_STRING = pd.ArrowDtype(pa.string())
+except Exception:
+    ARROW_STRING = None
+
+# Stable content key so cached resources invalidate when settings change
+settings_key = yaml.safe_dump(settings, sort_keys=True)
+
+
+# Cached backend instances - constructed once per settings content, not per click
+@st.cache_resource
+def get_transformer(settings_key: str) -> DataTransformer:
+    return DataTransformer(settings)
+
+@st.cache_resource
+def get_optimizer(settings_key: str) -> InventoryOptimizer:
+    return InventoryOptimizer(get_transformer(settings_key))
+
+
+# Cached data fetchers
+# Keyed on sorted tuples so identical reruns skip the network round-trip.
+# The leading underscore on _client tells Streamlit not to hash the client.
+@st.cache_data(ttl=600, show_spinner=False)
+def fetch_odoo_products(refs_key: tuple, _client):
+    return _client.get_products(internal_references=list(refs_key))
+
+@st.cache_data(ttl=600, show_spinner=False)
+def fetch_supabase_history(store_key: tuple, refs_key: tuple, _client):
+    """Fetch historical sales and store inventory concurrently.
+    The two round-trips are independent, so total latency is the slower of
+    the two instead of their sum."""
+    store_ids = list(store_key)
+    refs = list(refs_key)
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        sales_future = executor.submit(_client.get_historical_sales, store_ids, refs)
+        inv_future = executor.submit(_client.get_store_inventory, store_ids, refs)
+        return sales_future.result(), inv_future.result()
+
+
+# Union of line_details columns used on the Optimization and Review & Import
+# pages. Transformer byproducts (units_per_order, original_qty, po_unit_price,
+# product_id, line-level dates) are dropped before the frame enters session
+# state so they aren't copied and Arrow-serialized on every rerun.
+LINE_DETAIL_COLS = [
+    'store_id', 'store_name', 'po_number', 'internal_reference', 'product_name',
+    'barcode', 'warehouse', 'so_reference', 'product_uom_qty', 'price_unit',
+    'total_price', 'odoo_on_hand', 'odoo_available', 'store_on_hand',
+    'hist_avg_sales', 'flagged', 'flag_reason', 'shortage_details'
+]
+
+
+# Filter dropdown options, cached on small value tuples so Streamlit's
+# hasher never walks the full frame and the sort/str work runs only when
+# the distinct values actually change
+@st.cache_data(show_spinner=False)
+def sorted_ref_options(refs: tuple) -> list:
+    return sorted(refs)
+
+@st.cache_data(show_spinner=False)
+def flag_reason_options(reasons: tuple) -> list:
+    return ["All"] + sorted(str(r) for r in reasons if r)
+
+
+def set_line_details(details: pd.DataFrame):
+    """Assign line_details and refresh its cached derivatives so the
+    optimization click handler doesn't rescan the frame for unique keys."""
+    keep = [c for c in LINE_DETAIL_COLS if c in details.columns]
+    if keep:
+        details = details[keep]
+    st.session_state['line_details'] = details
+    if not details.empty and 'internal_reference' in details.columns:
+        st.session_state['unique_refs'] = tuple(details['internal_reference'].astype(str).unique())
+        st.session_state['unique_store_ids'] = tuple(
+            int(s) for s in details['store_id'].dropna().unique()
+        )
+        # Positional row indices per warehouse: both tabs and the summary
+        # reuse these instead of re-running the equality scan every render
+        warehouse_values = details['warehouse'].to_numpy()
+        st.session_state['wh_idx'] = {
+            wh: np.flatnonzero(warehouse_values == wh) for wh in ('CE', 'CW')
+        }
+    else:
+        st.session_state['unique_refs'] = ()
+        st.session_state['unique_store_ids'] = ()
+        st.session_state['wh_idx'] = {}
+
+
+def categorize_line_details(details: pd.DataFrame) -> pd.DataFrame:
+    """Convert heavily repeated string columns to categoricals so filters,
+    groupbys and Arrow serialization work on integer codes instead of
+    hashing the same strings row after row."""
+    for col in ['warehouse', 'internal_reference', 'store_name', 'flag_reason']:
+        if col in details.columns:
+            details[col] = details[col].astype('category')
+
+    # Mostly-unique string columns: Arrow-backed strings hand their buffers
+    # to the Arrow serializer without per-cell Python->UTF-8 conversion
+    if ARROW_STRING is not None:
+        for col in ['product_name', 'po_number', 'order_date', 'delivery_date',
+                    'so_reference', 'shortage_details']:
+            if col in details.columns:
+                try:
+                    details[col] = details[col].astype(ARROW_STRING)
+                except Exception:
+                    pass  # mixed/non-string data - leave the column as-is
+
+    return details
+
+
+def to_data_uri(series: pd.Series) -> pd.Series:
+    """Vectorized base64 -> data URI conversion for product image columns.
+    Leaves values that are empty or already data URIs untouched."""
+    s = series.astype('string')
+    mask = s.notna() & (s.str.len() > 0) & ~s.str.startswith('data:', na=False)
+    return pd.Series(
+        np.where(mask, 'data:image/png;base64,' + s.fillna(''), series),
+        index=series.index
+    )
+
 
 
 # Initialize Session State
@@ -55,6 +181,15 @@ if 'order_summaries' not in st.session_state:
     st.session_state['order_summaries'] = pd.DataFrame()
 if 'line_details' not in st.session_state:
     st.session_state['line_details'] = pd.DataFrame()
+if 'product_images' not in st.session_state:
+    # base64 image per SKU - kept out of line_details so the frame doesn't
+    # drag a multi-KB blob per row through every rerun
+    st.session_state['product_images'] = {}
+if 'unique_refs' not in st.session_state:
+    # Derivatives of line_details, refreshed by set_line_details()
+    st.session_state['unique_refs'] = ()
+    st.session_state['unique_store_ids'] = ()
+    st.session_state['wh_idx'] = {}
 if 'transform_errors' not in st.session_state:
     st.session_state['transform_errors'] = []
 
@@ -138,8 +273,9 @@ elif page == "Upload & Extract":
         if st.button("🗑️ Clear & Restart"):
             st.session_state['extracted_po_data'] = pd.DataFrame()
             st.session_state['po_errors'] = []
-            st.session_state['line_details'] = pd.DataFrame() # Clear downstream too
+            set_line_details(pd.DataFrame()) # Clear downstream too
             st.session_state['order_summaries'] = pd.DataFrame()
+            st.session_state['product_images'] = {}
             st.rerun()
         
         if st.button("Next: Transform", type="primary"):
@@ -151,8 +287,31 @@ elif page == "Upload & Extract":
         if uploaded_files:
             if st.button("Extract Data"):
                 with st.spinner("Extracting data from PDFs..."):
-                    file_tuples = [(f, f.name) for f in uploaded_files]
-                    extracted_df, errors = PDFExtractor.process_multiple_pdfs(file_tuples)
+                    # Spill each upload to a temp file so PDF bytes don't sit
+                    # in memory for the whole extraction; worker processes
+                    # receive a path instead of pickled contents
+                    tmp_paths = []
+                    try:
+                        file_tuples = []
+                        for f in uploaded_files:
+                            tmp = tempfile.NamedTemporaryFile(delete=False, suffix='.pdf')
+                            shutil.copyfileobj(f, tmp)
+                            tmp.close()
+                            tmp_paths.append(tmp.name)
+                            file_tuples.append((tmp.name, f.name))
+
+                        progress_bar = st.progress(0)
+                        extracted_df, errors = PDFExtractor.process_pdf_paths_parallel(
+                            file_tuples,
+                            progress_callback=lambda done, total: progress_bar.progress(done / total)
+                        )
+                        progress_bar.empty()
+                    finally:
+                        for path in tmp_paths:
+                            try:
+                                os.unlink(path)
+                            except OSError:
+                                pass
 
                     st.session_state['extracted_po_data'] = extracted_df
                     st.session_state['po_errors'] = errors
@@ -214,11 +373,11 @@ elif page == "Transform & Review":
                         # Get Unique Internal Refs
                         refs = st.session_state['extracted_po_data']['Internal Reference'].unique().astype(str).tolist()
 
-                        # Fetch Product Data
-                        products = st.session_state['odoo_client'].get_products(internal_references=refs)
+                        # Fetch Product Data (cached on the sorted refs tuple)
+                        products = fetch_odoo_products(tuple(sorted(refs)), st.session_state['odoo_client'])
 
                         # Transform
-                        transformer = DataTransformer(settings)
+                        transformer = get_transformer(settings_key)
                         latest_so = st.session_state.get('config_latest_so')
                         summary, details, logs = transformer.transform_data(
                             st.session_state['extracted_po_data'],
@@ -226,8 +385,16 @@ elif page == "Transform & Review":
                             latest_so_number=latest_so
                         )
 
+                        # Pop images out of the frame: one base64 string per
+                        # SKU in a dict instead of one per order line
+                        if 'product_image' in details.columns:
+                            st.session_state['product_images'] = dict(
+                                zip(details['internal_reference'], details['product_image'])
+                            )
+                            details = details.drop(columns=['product_image'])
+
                         st.session_state['order_summaries'] = summary
-                        st.session_state['line_details'] = details
+                        set_line_details(categorize_line_details(details))
                         st.session_state['transform_errors'] = logs
                         st.rerun()
 
@@ -273,17 +440,27 @@ elif page == "Inventory Optimization":
          st.warning("No line details available.")
     else:
         # Ensure columns exist (migration for old session state)
-        # This must be done BEFORE any filtering or copying occurs
-        for col in ['store_on_hand', 'hist_avg_sales']:
-            if col not in st.session_state['line_details'].columns:
-                st.session_state['line_details'][col] = 0
-                st.session_state['line_details'][col] = st.session_state['line_details'][col].astype(float) # Ensure type
-
-        # Ensure product_image and shortage_details columns exist
-        if 'product_image' not in st.session_state['line_details'].columns:
-            st.session_state['line_details']['product_image'] = None
-        if 'shortage_details' not in st.session_state['line_details'].columns:
-            st.session_state['line_details']['shortage_details'] = None
+        # This must be done BEFORE any filtering or copying occurs.
+        # All missing columns are added in one concat rather than one
+        # column-insert (and BlockManager reshuffle) per column.
+        required_cols = {'store_on_hand': 0.0, 'hist_avg_sales': 0.0, 'shortage_details': None}
+        missing = [c for c in required_cols if c not in st.session_state['line_details'].columns]
+        if missing:
+            pad = pd.DataFrame(
+                {c: required_cols[c] for c in missing},
+                index=st.session_state['line_details'].index
+            )
+            st.session_state['line_details'] = pd.concat(
+                [st.session_state['line_details'], pad], axis=1, copy=False
+            )
+
+        # Migration for old session state: images used to live inside line_details
+        if 'product_image' in st.session_state['line_details'].columns:
+            st.session_state['product_images'] = dict(
+                zip(st.session_state['line_details']['internal_reference'],
+                    st.session_state['line_details']['product_image'])
+            )
+            st.session_state['line_details'] = st.session_state['line_details'].drop(columns=['product_image'])
                 
         # Optimization Trigger
         col1, col2 = st.columns([1, 4])
@@ -296,15 +473,16 @@ elif page == "Inventory Optimization":
                     store_inv = pd.DataFrame()
                 else:
                     # Fetch Supabase Data
-                    # Ensure we pass the correct keys
-                    refs = st.session_state['line_details']['internal_reference'].unique().astype(str).tolist()
-                    store_ids = st.session_state['line_details']['store_id'].unique().tolist()
-                    # Ensure store_ids are ints
-                    store_ids = [int(s) for s in store_ids if pd.notna(s)]
+                    # Unique keys were cached at assignment time by set_line_details
+                    refs = list(st.session_state['unique_refs'])
+                    store_ids = list(st.session_state['unique_store_ids'])
                     
                     with st.spinner("Fetching History from Supabase..."):
-                        hist_sales = st.session_state['supabase_client'].get_historical_sales(store_ids, refs)
-                        store_inv = st.session_state['supabase_client'].get_store_inventory(store_ids, refs)
+                        hist_sales, store_inv = fetch_supabase_history(
+                            tuple(sorted(store_ids)),
+                            tuple(sorted(refs)),
+                            st.session_state['supabase_client']
+                        )
 
                     # --- DEBUG VIEW (User Request) ---
                     with st.expander("🕵️‍♂️ Verify Supabase Data Extraction", expanded=True):
@@ -336,9 +514,8 @@ elif page == "Inventory Optimization":
                         st.write(f"Data types: {sample_keys.dtypes.to_dict()}")
                     # ---------------------------------
 
-                transformer = DataTransformer(settings)
-                optimizer = InventoryOptimizer(transformer)
-                
+                optimizer = get_optimizer(settings_key)
+
                 optimized_lines, logs = optimizer.optimize_allocations(
                     st.session_state['line_details'],
                     hist_sales,
@@ -350,10 +527,13 @@ elif page == "Inventory Optimization":
                     st.write("### After Optimization Merge Results")
                     sample = optimized_lines[['internal_reference', 'store_id', 'hist_avg_sales', 'store_on_hand']].head(10)
                     st.dataframe(sample)
-                    st.write(f"Non-zero hist_avg_sales count: {(optimized_lines['hist_avg_sales'] > 0).sum()}")
-                    st.write(f"Non-zero store_on_hand count: {(optimized_lines['store_on_hand'] > 0).sum()}")
+                    # count_nonzero on the raw arrays: one scan, no boolean Series
+                    st.write(f"Non-zero hist_avg_sales count: {int(np.count_nonzero(optimized_lines['hist_avg_sales'].to_numpy() > 0))}")
+                    st.write(f"Non-zero store_on_hand count: {int(np.count_nonzero(optimized_lines['store_on_hand'].to_numpy() > 0))}")
 
-                st.session_state['line_details'] = optimized_lines
+                # The optimizer's merges/assignments decay categoricals back to
+                # object dtype; re-apply before storing
+                set_line_details(categorize_line_details(optimized_lines))
                 st.success("Optimization Complete")
                 st.rerun()
 
@@ -363,49 +543,40 @@ elif page == "Inventory Optimization":
 
         # Create summary by product and warehouse
         if not st.session_state['line_details'].empty:
-            summary_data = []
-
-            for warehouse in ['CE', 'CW']:
-                wh_data = st.session_state['line_details'][st.session_state['line_details']['warehouse'] == warehouse].copy()
-
-                if wh_data.empty:
-                    continue
+            wh_idx = st.session_state['wh_idx']
+            wh_data = st.session_state['line_details'].iloc[
+                np.concatenate([wh_idx.get('CE', []), wh_idx.get('CW', [])]).astype(int)
+            ]
 
-                # Group by internal_reference to get totals
+            if not wh_data.empty:
+                # Single grouped pass over both warehouses instead of a
+                # per-warehouse filter/groupby/concat loop
                 # Note: odoo_available is already warehouse-specific (set in data_transformer based on warehouse)
-                product_groups = wh_data.groupby('internal_reference').agg({
-                    'product_uom_qty': 'sum',  # Total demand across all stores
-                    'odoo_available': 'first',  # Available (warehouse-specific, same for all rows of same product in this warehouse)
-                    'odoo_on_hand': 'first',    # On hand (warehouse-specific, same for all rows of same product in this warehouse)
-                    'product_name': 'first',
-                    'product_image': 'first'
-                }).reset_index()
-
-                product_groups['warehouse'] = warehouse
+                summary_df = wh_data.groupby(['warehouse', 'internal_reference'], sort=False, observed=True).agg(
+                    product_uom_qty=('product_uom_qty', 'sum'),   # Total demand across all stores
+                    odoo_available=('odoo_available', 'first'),   # Warehouse-specific, same for all rows of same product
+                    odoo_on_hand=('odoo_on_hand', 'first'),
+                    product_name=('product_name', 'first')
+                ).reset_index()
 
                 # Filter conditions:
                 # 1. Total demand > Available (needs allocation)
                 # 2. Available > 0 (has some inventory to allocate)
-                product_groups['needs_allocation'] = (
-                    (product_groups['product_uom_qty'] > product_groups['odoo_available']) &
-                    (product_groups['odoo_available'] > 0)
+                needs_allocation = (
+                    (summary_df['product_uom_qty'] > summary_df['odoo_available']) &
+                    (summary_df['odoo_available'] > 0)
                 )
 
-                summary_data.append(product_groups)
-
-            if summary_data:
-                summary_df = pd.concat(summary_data, ignore_index=True)
-
                 # Filter to show only products that need allocation
-                allocation_needed = summary_df[summary_df['needs_allocation'] == True].copy()
+                allocation_needed = summary_df[needs_allocation].copy()
 
                 if not allocation_needed.empty:
                     # Calculate shortage
                     allocation_needed['shortage'] = allocation_needed['product_uom_qty'] - allocation_needed['odoo_available']
 
-                    # Convert images to data URIs
-                    allocation_needed['product_image'] = allocation_needed['product_image'].apply(
-                        lambda x: f"data:image/png;base64,{x}" if pd.notna(x) and x and not str(x).startswith('data:') else x
+                    # Materialize image column from the per-SKU dict for display
+                    allocation_needed['product_image'] = to_data_uri(
+                        allocation_needed['internal_reference'].map(st.session_state['product_images'])
                     )
 
                     # Prepare display columns
@@ -448,8 +619,18 @@ elif page == "Inventory Optimization":
         # Interactive Editor
         # We need to update session state with edits
         
+        # Fragment: widget interactions inside a tab (filters, editor, save)
+        # rerun only this function, not the whole page with its summary
+        # groupby and the other tab's serialization
+        @st.fragment
         def render_warehouse_tab(warehouse_code):
-            df = st.session_state['line_details'][st.session_state['line_details']['warehouse'] == warehouse_code].copy()
+            # No .copy() here: df and the filter-narrowed views below are
+            # read-only; only display_df (mutated for display) gets copied.
+            # Row positions come from the precomputed warehouse index, so no
+            # equality scan runs per render.
+            df = st.session_state['line_details'].iloc[
+                st.session_state['wh_idx'].get(warehouse_code, [])
+            ]
             if df.empty:
                 st.info(f"No orders for {warehouse_code}")
                 return
@@ -480,7 +661,7 @@ elif page == "Inventory Optimization":
 
             with filter_col1:
                 # Get unique internal references for this warehouse
-                available_refs = sorted(df['internal_reference'].unique().tolist())
+                available_refs = sorted_ref_options(tuple(df['internal_reference'].unique()))
                 selected_refs = st.multiselect(
                     "Filter by Internal Reference (SKU)",
                     options=available_refs,
@@ -497,8 +678,7 @@ elif page == "Inventory Optimization":
 
             with filter_col3:
                 # Get unique flag reasons, excluding None/NaN
-                flag_reasons = df['flag_reason'].dropna().unique().tolist()
-                flag_reasons = ["All"] + sorted([str(r) for r in flag_reasons if r])
+                flag_reasons = flag_reason_options(tuple(df['flag_reason'].dropna().unique()))
                 reason_filter = st.selectbox(
                     "Flag Reason",
                     options=flag_reasons,
@@ -511,8 +691,8 @@ elif page == "Inventory Optimization":
                 if st.button("Clear Filters", key=f"clear_filters_{warehouse_code}"):
                     st.rerun()
 
-            # Apply filters
-            filtered_df = df.copy()
+            # Apply filters (each step narrows the view; nothing mutates it)
+            filtered_df = df
 
             if selected_refs:
                 filtered_df = filtered_df[filtered_df['internal_reference'].isin(selected_refs)]
@@ -530,13 +710,13 @@ elif page == "Inventory Optimization":
                 st.info(f"Showing {len(filtered_df)} of {len(df)} items (filtered)")
 
             # Create display dataframe with converted images
-            display_df = filtered_df[full_cols].copy()
+            display_df = filtered_df[[c for c in full_cols if c != 'product_image']].copy()
 
-            # Convert base64 images to data URIs for Streamlit display only
-            if 'product_image' in display_df.columns:
-                display_df['product_image'] = display_df['product_image'].apply(
-                    lambda x: f"data:image/png;base64,{x}" if pd.notna(x) and x and not str(x).startswith('data:') else x
-                )
+            # Materialize the image column from the per-SKU dict (display only)
+            display_df['product_image'] = to_data_uri(
+                display_df['internal_reference'].map(st.session_state['product_images'])
+            )
+            display_df = display_df[full_cols]
 
             st.divider()
 
@@ -565,22 +745,25 @@ elif page == "Inventory Optimization":
                 if flagged_count > 0:
                     if st.button(f"🗑️ Delete {flagged_count} Flagged Items", key=f"delete_flagged_{warehouse_code}"):
                         # Update session state with edited values first
-                        for col in editable_cols:
-                            st.session_state['line_details'].loc[filtered_df.index, col] = edited_df[col].values
+                        # (single block assignment instead of one .loc per column)
+                        edits = edited_df[editable_cols].set_axis(filtered_df.index)
+                        st.session_state['line_details'].loc[filtered_df.index, editable_cols] = edits
 
                         # Remove flagged rows from main DF
                         indices_to_drop = edited_df[edited_df['flagged']].index
-                        st.session_state['line_details'] = st.session_state['line_details'].drop(indices_to_drop)
+                        set_line_details(st.session_state['line_details'].drop(indices_to_drop))
                         st.rerun()
 
             with col2:
                 # Save changes button
                 if st.button(f"💾 Save Changes to {warehouse_code}", key=f"save_{warehouse_code}"):
                     # Update session state with edited values
-                    for col in editable_cols:
-                        st.session_state['line_details'].loc[filtered_df.index, col] = edited_df[col].values
+                    # (single block assignment instead of one .loc per column)
+                    edits = edited_df[editable_cols].set_axis(filtered_df.index)
+                    st.session_state['line_details'].loc[filtered_df.index, editable_cols] = edits
+                    # No st.rerun(): the button click already reruns this
+                    # fragment, which re-renders the editor from session state
                     st.success(f"✅ Changes saved for {warehouse_code}")
-                    st.rerun()
                 
         with tab_ce:
             render_warehouse_tab('CE')
@@ -600,9 +783,15 @@ elif page == "Review & Import":
     st.subheader("Final Summary")
     
     # Calculate summary stats
-    total_orders = st.session_state['line_details']['store_id'].nunique()
-    total_lines = len(st.session_state['line_details'])
-    total_value = (st.session_state['line_details']['product_uom_qty'] * st.session_state['line_details']['price_unit']).sum()
+    # nansum over the product skips lines whose qty/price was cleared in
+    # the data editor (those arrive as NaN), matching the skipna sum the
+    # old pandas expression had - a plain dot product would render $nan
+    ld = st.session_state['line_details']
+    qty = ld['product_uom_qty'].to_numpy(dtype=np.float64, copy=False)
+    price = ld['price_unit'].to_numpy(dtype=np.float64, copy=False)
+    total_orders = ld['store_id'].nunique()
+    total_lines = qty.size
+    total_value = float(np.nansum(qty * price))
     
     col_stat1, col_stat2, col_stat3 = st.columns(3)
     col_stat1.metric("Total Orders", total_orders)
@@ -618,43 +807,66 @@ elif page == "Review & Import":
     import io
     from datetime import datetime
 
-    def to_excel(summaries, lines):
+    # Cached on frame content hashes: reruns with unchanged summaries/lines
+    # return the previously built bytes instead of re-running the writer.
+    @st.cache_data(show_spinner=False)
+    def to_excel(summaries: pd.DataFrame, lines: pd.DataFrame) -> bytes:
+        def _col(series: pd.Series):
+            # NaN becomes None so xlsxwriter emits a blank cell, matching
+            # what DataFrame.to_excel did. write_number() rejects NaN/inf
+            # outright, and a numeric cell cleared in the data editor
+            # arrives here as NaN.
+            return series.astype(object).where(series.notna(), None).to_numpy()
+
         output = io.BytesIO()
-        with pd.ExcelWriter(output, engine='openpyxl') as writer:
+        # xlsxwriter in constant_memory mode streams rows out as they are
+        # written instead of holding the whole workbook in RAM
+        with pd.ExcelWriter(output, engine='xlsxwriter',
+                            engine_kwargs={'options': {'constant_memory': True}}) as writer:
+            # Rows are written straight to the xlsxwriter worksheets (one
+            # column-array pull per source column) - no intermediate frames
+            # are built just to relabel columns.
+
             # Sheet 1: Sales Orders (Headers)
             # Columns: Customer, Order Date, Delivery Date, Client Order Ref
             # Note: SO Reference is NOT included - Odoo will auto-generate it
             if not summaries.empty:
-                headers_df = pd.DataFrame({
-                    'Customer': summaries['official_name'],
-                    'Order Date': summaries['order_date'],
-                    'Delivery Date': summaries['delivery_date'],
-                    'Client Order Ref': summaries['po_numbers']
-                })
-                headers_df.to_excel(writer, sheet_name='Sales Orders', index=False)
-            
+                ws = writer.book.add_worksheet('Sales Orders')
+                ws.write_row(0, 0, ('Customer', 'Order Date', 'Delivery Date', 'Client Order Ref'))
+                header_cols = (
+                    _col(summaries['official_name']),
+                    _col(summaries['order_date']),
+                    _col(summaries['delivery_date']),
+                    _col(summaries['po_numbers'])
+                )
+                for i, row in enumerate(zip(*header_cols), 1):
+                    ws.write_row(i, 0, row)
+
             # Sheet 2: Sales Order Lines (Details)
             # Columns: Order Reference, Store, Product (Barcode), Description, Quantity, Unit Price, Lock Unit Price
             if not lines.empty:
                 # Filter flagged items out? User didn't explicitly say. But usually we only import clean rows.
                 # User: "Review and Import".
                 # Let's import logic: "valid_lines = ... [~flagged]"
-                valid_lines = lines[~lines['flagged']].copy()
+                valid_lines = lines[~lines['flagged']]
 
                 # Create store display name (e.g., "T&T Supermarket Inc., Metrotown - 001")
-                valid_lines['store_display'] = valid_lines['store_name'] + ' - ' + valid_lines['store_id'].astype(str).str.zfill(3)
-
-                lines_df = pd.DataFrame({
-                    'Order Reference': valid_lines['so_reference'],
-                    'Store': valid_lines['store_display'],
-                    'Product': valid_lines['barcode'],  # Use barcode instead of internal_reference
-                    'Description': valid_lines['product_name'],
-                    'Quantity': valid_lines['product_uom_qty'],
-                    'Unit Price': valid_lines['price_unit'],
-                    'Lock Unit Price': True  # Set to TRUE for all lines
-                })
-                lines_df.to_excel(writer, sheet_name='Sales Order Lines', index=False)
-                
+                store_display = valid_lines['store_name'].astype(str) + ' - ' + valid_lines['store_id'].astype(str).str.zfill(3)
+
+                ws = writer.book.add_worksheet('Sales Order Lines')
+                ws.write_row(0, 0, ('Order Reference', 'Store', 'Product', 'Description',
+                                    'Quantity', 'Unit Price', 'Lock Unit Price'))
+                line_cols = (
+                    _col(valid_lines['so_reference']),
+                    _col(store_display),
+                    _col(valid_lines['barcode']),   # Use barcode instead of internal_reference
+                    _col(valid_lines['product_name']),
+                    _col(valid_lines['product_uom_qty']),
+                    _col(valid_lines['price_unit'])
+                )
+                for i, row in enumerate(zip(*line_cols), 1):
+                    ws.write_row(i, 0, (*row, True))  # Lock Unit Price: TRUE for all lines
+
         return output.getvalue()
 
     st.subheader("Export for Odoo")
@@ -1,67 +1,112 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from typing import List, Optional, Dict, Literal
+from dataclasses import dataclass, field
 from datetime import datetime, date
 
+# Extractor DataFrame columns -> model field names. Renaming a whole frame
+# once (df.rename(columns=PO_COLUMN_TO_FIELD)) replaces pydantic resolving
+# an alias per field per row, so the model itself stays alias-free.
+PO_COLUMN_TO_FIELD = {
+    "PO No.": "po_number",
+    "Store ID": "store_id",
+    "Store Name": "store_name",
+    "Order Date": "order_date",
+    "Delivery Date": "delivery_date",
+    "Internal Reference": "internal_reference",
+    "Description": "description",
+    "Size": "size",
+    "Pack": "pack",
+    "# of Order": "ordered_qty",
+    "Price": "price",
+}
+
 class PurchaseOrderLine(BaseModel):
     """Raw extracted PO line from PDF"""
-    po_number: str = Field(alias="PO No.")
-    store_id: int = Field(alias="Store ID")
-    store_name: str = Field(alias="Store Name")
-    order_date: str = Field(alias="Order Date")
-    delivery_date: str = Field(alias="Delivery Date")
-    internal_reference: str = Field(alias="Internal Reference")
-    description: str = Field(alias="Description")
-    size: Optional[str] = Field(None, alias="Size")
-    pack: Optional[str] = Field(None, alias="Pack")
-    ordered_qty: float = Field(alias="# of Order")
-    price: float = Field(alias="Price")
+    po_number: str
+    store_id: int
+    store_name: str
+    order_date: str
+    delivery_date: str
+    internal_reference: str
+    description: str
+    size: Optional[str] = None
+    pack: Optional[str] = None
+    ordered_qty: float
+    price: float
 
-    class Config:
-        populate_by_name = True
+    @classmethod
+    def from_row(cls, row: Dict) -> "PurchaseOrderLine":
+        """Build from an already-validated extractor row, bypassing the
+        validators (the extractor has done the cleaning)"""
+        return cls.model_construct(
+            po_number=str(row.get("PO No.", "")),
+            store_id=int(row.get("Store ID", 0)),
+            store_name=row.get("Store Name", ""),
+            order_date=row.get("Order Date", ""),
+            delivery_date=row.get("Delivery Date", ""),
+            internal_reference=str(row.get("Internal Reference", "")),
+            description=row.get("Description", ""),
+            size=row.get("Size"),
+            pack=row.get("Pack"),
+            ordered_qty=float(row.get("# of Order", 0)),
+            price=float(row.get("Price", 0)),
+        )
+
+    @classmethod
+    def from_trusted(cls, row: Dict) -> "PurchaseOrderLine":
+        """Build from a row that is already typed with field names (e.g.
+        po_data.to_dict('records') after extraction): straight attribute
+        assignment, no validators and no coercion. Use the regular
+        constructor for untrusted input such as manual corrections."""
+        return cls.model_construct(**row)
 
 class ProductVariant(BaseModel):
     """Odoo product variant data"""
+    model_config = ConfigDict(populate_by_name=True)
+
     id: int
     name: str
     barcode: Optional[str] = None
     default_code: Optional[str] = None  # Internal Reference
     units_per_order: Optional[float] = Field(None, alias="x_studio_tt_om_int")
     tt_price: Optional[float] = Field(None, alias="x_studio_tt_price")
-    
+
     # Inventory fields
     ce_on_hand: Optional[float] = Field(0, alias="x_studio_canada_east_on_hand")
     ce_available: Optional[float] = Field(0, alias="x_studio_ce_available")
     cw_on_hand: Optional[float] = Field(0, alias="x_studio_canada_west_on_hand")
     cw_available: Optional[float] = Field(0, alias="x_studio_cw_available")
 
-    class Config:
-        populate_by_name = True
-
-class SalesOrderLine(BaseModel):
+# The SO containers are plain data holders built from already-validated
+# values, so they are slotted dataclasses rather than pydantic models:
+# no per-instance __dict__ and no validator pass per object.
+@dataclass(slots=True)
+class SalesOrderLine:
     """Processed SO line ready for Odoo import"""
     product_id: int
     product_uom_qty: float
     price_unit: float
     name: str # Description
-    
+
     # Metadata for UI (not sent to Odoo in this structure, but used for processing)
     internal_reference: str
     store_id: int
     warehouse: Literal["CE", "CW"]
     flagged: bool = False
     flag_reason: Optional[str] = None
-    
+
     # Inventory snapshot for UI
     available_qty: float = 0
     on_hand_qty: float = 0
     store_inventory_qty: Optional[float] = None
     avg_monthly_sales: Optional[float] = None
 
-class SalesOrder(BaseModel):
+@dataclass(slots=True)
+class SalesOrder:
     """Odoo Sales Order Header"""
     partner_id: int  # Customer/Store ID
     date_order: datetime
-    lines: List[SalesOrderLine] = []
     warehouse: Literal["CE", "CW"]
     store_id: int
     client_order_ref: str # PO Number
+    lines: List[SalesOrderLine] = field(default_factory=list)
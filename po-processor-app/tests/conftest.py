@@ -0,0 +1,61 @@
+"""
+Shared pytest fixtures for the integration tests.
+
+The Odoo and Supabase clients are session-scoped: one authenticated
+TLS connection is set up per test session and reused by every test,
+instead of each test paying its own handshake. Tests are skipped (not
+failed) when the corresponding credentials are absent, so the suite
+stays runnable in environments without .env secrets.
+"""
+
+import os
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import pytest
+from dotenv import load_dotenv
+
+from backend.odoo_client import OdooClient
+from backend.supabase_client import SupabaseClient
+
+# Load environment once for the whole session
+load_dotenv()
+
+# Test data from T&T PO 260117110311.PDF, shared by the connectivity tests
+TEST_SKUS = ['535553', '538752', '538753', '532827', '537861', '537868', '519279', '755734']
+TEST_STORES = [20, 28, 37]  # Weldrick-020, Waterloo-028, London-037
+
+
+@pytest.fixture(scope='session')
+def supabase():
+    key = os.getenv('SUPABASE_KEY')
+    if not key:
+        pytest.skip("SUPABASE_KEY not configured")
+
+    client = SupabaseClient(
+        url=os.getenv('SUPABASE_URL', 'https://zzxfwmgftwojhmuhkrrp.supabase.co'),
+        key=key
+    )
+    if not client.connect():
+        pytest.skip("Could not connect to Supabase")
+    return client
+
+
+@pytest.fixture(scope='session')
+def odoo():
+    api_key = os.getenv('ODOO_API_KEY')
+    if not api_key:
+        pytest.skip("ODOO_API_KEY not configured")
+
+    client = OdooClient(
+        url=os.getenv('ODOO_URL', 'https://one-team-worldwide-ltd.odoo.com'),
+        db=os.getenv('ODOO_DB', 'one-team-worldwide-ltd'),
+        username=os.getenv('ODOO_USERNAME'),
+        api_key=api_key
+    )
+    if not client.connect():
+        pytest.skip("Could not connect to Odoo")
+    return client
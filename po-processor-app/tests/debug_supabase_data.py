@@ -22,6 +22,82 @@ load_dotenv()
 TEST_SKUS = ['535553', '538752', '538753', '532827', '537861', '537868', '519279', '755734']
 TEST_STORES = [20, 28, 37]  # Weldrick-020, Waterloo-028, London-037
 
+# Deduplicated once at module load: reused for .in_() payloads (smaller
+# ANY($1) arrays) and for set-difference checks without rebuilding sets
+TEST_SKU_SET = frozenset(TEST_SKUS)
+TEST_STORE_SET = frozenset(TEST_STORES)
+
+# Known result shapes: passing these to DataFrame.from_records skips the
+# union-of-keys column inference that pd.DataFrame(list_of_dicts) performs
+_PRODUCT_COLS = ['id', 'item_id']
+_STORE_COLS = ['id', 'store_number']
+_SALES_COLS = ['product_id', 'store_id', 'period_start', 'period_end', 'total_quantity_sold']
+_INV_COLS = ['product_id', 'store_id', 'snapshot_date', 'quantity']
+
+# Section banners, built once at import instead of per print
+_BAR = "=" * 80
+_SUB = "-" * 80
+
+def fetch_debug_payload(client):
+    """
+    Fetch all four debug resultsets (products, stores, sales, inventory) in
+    a single round-trip via the debug_po_match RPC (migration 005).
+    Returns None if the function isn't installed.
+    """
+    try:
+        response = client.client.rpc('debug_po_match', {
+            'skus': TEST_SKUS,
+            'stores': TEST_STORES
+        }).execute()
+        return response.data
+    except Exception as e:
+        print(f"⚠️  debug_po_match RPC unavailable ({e})")
+        print("   Falling back to sequential queries (run migration 005 to avoid 4x round-trips)\n")
+        return None
+
+
+def fetch_debug_payload_sequential(client):
+    """Fallback: same payload shape as fetch_debug_payload, one query per table"""
+    payload = {}
+
+    response = client.client.table('products')\
+        .select('id, item_id')\
+        .in_('item_id', sorted(TEST_SKU_SET))\
+        .execute()
+    payload['products'] = response.data or []
+
+    response = client.client.table('stores')\
+        .select('id, store_number')\
+        .in_('store_number', sorted(TEST_STORE_SET))\
+        .execute()
+    payload['stores'] = response.data or []
+
+    product_ids = [row['id'] for row in payload['products']]
+    store_ids = [row['id'] for row in payload['stores']]
+
+    # Project only the columns the debug output uses; '*' would ship every
+    # column (and parse it) just to be printed or dropped
+    if product_ids and store_ids:
+        response = client.client.table('sales_performance')\
+            .select('product_id, store_id, period_start, period_end, total_quantity_sold')\
+            .in_('product_id', product_ids)\
+            .in_('store_id', store_ids)\
+            .execute()
+        payload['sales'] = response.data or []
+
+        response = client.client.table('inventory_snapshots')\
+            .select('product_id, store_id, snapshot_date, quantity')\
+            .in_('product_id', product_ids)\
+            .in_('store_id', store_ids)\
+            .execute()
+        payload['inventory'] = response.data or []
+    else:
+        payload['sales'] = []
+        payload['inventory'] = []
+
+    return payload
+
+
 def main():
     # Initialize Supabase
     supabase_url = os.getenv('SUPABASE_URL', 'https://zzxfwmgftwojhmuhkrrp.supabase.co')
@@ -31,9 +107,9 @@ def main():
         print("❌ ERROR: SUPABASE_KEY not found in .env file")
         return
 
-    print("=" * 80)
+    print(_BAR)
     print("🔍 SUPABASE DATA DEBUGGING")
-    print("=" * 80)
+    print(_BAR)
 
     client = SupabaseClient(supabase_url, supabase_key)
 
@@ -43,70 +119,62 @@ def main():
 
     print("✅ Connected to Supabase\n")
 
+    # Fetch everything in one round-trip (falls back to four queries if the
+    # debug_po_match function isn't installed)
+    payload = fetch_debug_payload(client)
+    if payload is None:
+        try:
+            payload = fetch_debug_payload_sequential(client)
+        except Exception as e:
+            print(f"❌ Error fetching debug data: {e}")
+            return
+
     # Step 1: Check Products Table
-    print("-" * 80)
+    print(_SUB)
     print("STEP 1: Checking products table for SKUs from PDF")
-    print("-" * 80)
+    print(_SUB)
     print(f"Looking for SKUs: {TEST_SKUS}\n")
 
-    try:
-        response = client.client.table('products')\
-            .select('id, item_id')\
-            .in_('item_id', TEST_SKUS)\
-            .execute()
+    if payload['products']:
+        df_products = pd.DataFrame.from_records(payload['products'], columns=_PRODUCT_COLS)
+        print(f"✅ Found {len(df_products)} products:")
+        print(df_products.to_string(index=False))
+        print()
 
-        if response.data:
-            df_products = pd.DataFrame(response.data)
-            print(f"✅ Found {len(df_products)} products:")
-            print(df_products.to_string(index=False))
-            print()
-
-            found_skus = set(df_products['item_id'].tolist())
-            missing_skus = set(TEST_SKUS) - found_skus
-            if missing_skus:
-                print(f"⚠️  Missing SKUs in products table: {missing_skus}")
-        else:
-            print("❌ No products found! This is the root cause.")
-            print("   The 'products' table doesn't have any matching item_id values.")
-            return
-    except Exception as e:
-        print(f"❌ Error querying products table: {e}")
+        found_skus = set(df_products['item_id'].tolist())
+        missing_skus = TEST_SKU_SET - found_skus
+        if missing_skus:
+            print(f"⚠️  Missing SKUs in products table: {missing_skus}")
+    else:
+        print("❌ No products found! This is the root cause.")
+        print("   The 'products' table doesn't have any matching item_id values.")
         return
 
     # Step 2: Check Stores Table
-    print("\n" + "-" * 80)
+    print("\n" + _SUB)
     print("STEP 2: Checking stores table for store numbers from PDF")
-    print("-" * 80)
+    print(_SUB)
     print(f"Looking for stores: {TEST_STORES}\n")
 
-    try:
-        response = client.client.table('stores')\
-            .select('id, store_number')\
-            .in_('store_number', TEST_STORES)\
-            .execute()
+    if payload['stores']:
+        df_stores = pd.DataFrame.from_records(payload['stores'], columns=_STORE_COLS)
+        print(f"✅ Found {len(df_stores)} stores:")
+        print(df_stores.to_string(index=False))
+        print()
 
-        if response.data:
-            df_stores = pd.DataFrame(response.data)
-            print(f"✅ Found {len(df_stores)} stores:")
-            print(df_stores.to_string(index=False))
-            print()
-
-            found_stores = set(df_stores['store_number'].tolist())
-            missing_stores = set(TEST_STORES) - found_stores
-            if missing_stores:
-                print(f"⚠️  Missing stores in stores table: {missing_stores}")
-        else:
-            print("❌ No stores found! This is another root cause.")
-            print("   The 'stores' table doesn't have any matching store_number values.")
-            return
-    except Exception as e:
-        print(f"❌ Error querying stores table: {e}")
+        found_stores = set(df_stores['store_number'].tolist())
+        missing_stores = TEST_STORE_SET - found_stores
+        if missing_stores:
+            print(f"⚠️  Missing stores in stores table: {missing_stores}")
+    else:
+        print("❌ No stores found! This is another root cause.")
+        print("   The 'stores' table doesn't have any matching store_number values.")
         return
 
     # Step 3: Check Sales Performance
-    print("\n" + "-" * 80)
+    print("\n" + _SUB)
     print("STEP 3: Checking sales_performance table")
-    print("-" * 80)
+    print(_SUB)
 
     product_ids = df_products['id'].tolist()
     store_ids = df_stores['id'].tolist()
@@ -114,49 +182,31 @@ def main():
     print(f"Looking for product_ids: {product_ids}")
     print(f"Looking for store_ids: {store_ids}\n")
 
-    try:
-        response = client.client.table('sales_performance')\
-            .select('*')\
-            .in_('product_id', product_ids)\
-            .in_('store_id', store_ids)\
-            .execute()
-
-        if response.data:
-            df_sales = pd.DataFrame(response.data)
-            print(f"✅ Found {len(df_sales)} sales records:")
-            print(df_sales.to_string(index=False))
-        else:
-            print("⚠️  No sales performance data found for these product/store combinations.")
-            print("   This means hist_avg_sales will be 0 for all items.")
-    except Exception as e:
-        print(f"❌ Error querying sales_performance table: {e}")
+    if payload['sales']:
+        df_sales = pd.DataFrame.from_records(payload['sales'], columns=_SALES_COLS)
+        print(f"✅ Found {len(df_sales)} sales records:")
+        print(df_sales.to_string(index=False))
+    else:
+        print("⚠️  No sales performance data found for these product/store combinations.")
+        print("   This means hist_avg_sales will be 0 for all items.")
 
     # Step 4: Check Inventory Snapshots
-    print("\n" + "-" * 80)
+    print("\n" + _SUB)
     print("STEP 4: Checking inventory_snapshots table")
-    print("-" * 80)
-
-    try:
-        response = client.client.table('inventory_snapshots')\
-            .select('*')\
-            .in_('product_id', product_ids)\
-            .in_('store_id', store_ids)\
-            .execute()
+    print(_SUB)
 
-        if response.data:
-            df_inventory = pd.DataFrame(response.data)
-            print(f"✅ Found {len(df_inventory)} inventory records:")
-            print(df_inventory.to_string(index=False))
-        else:
-            print("⚠️  No inventory snapshot data found for these product/store combinations.")
-            print("   This means store_on_hand will be 0 for all items.")
-    except Exception as e:
-        print(f"❌ Error querying inventory_snapshots table: {e}")
+    if payload['inventory']:
+        df_inventory = pd.DataFrame.from_records(payload['inventory'], columns=_INV_COLS)
+        print(f"✅ Found {len(df_inventory)} inventory records:")
+        print(df_inventory.to_string(index=False))
+    else:
+        print("⚠️  No inventory snapshot data found for these product/store combinations.")
+        print("   This means store_on_hand will be 0 for all items.")
 
     # Step 5: Test the actual client methods
-    print("\n" + "=" * 80)
+    print("\n" + _BAR)
     print("STEP 5: Testing SupabaseClient methods (as used in the app)")
-    print("=" * 80)
+    print(_BAR)
 
     print("\n📊 get_historical_sales():")
     hist_sales = client.get_historical_sales(TEST_STORES, TEST_SKUS)
@@ -172,9 +222,9 @@ def main():
     else:
         print("❌ Empty DataFrame returned")
 
-    print("\n" + "=" * 80)
+    print("\n" + _BAR)
     print("SUMMARY")
-    print("=" * 80)
+    print(_BAR)
     print("\nPossible causes for zeros in store_on_hand and hist_avg_sales:")
     print("1. ❌ SKUs don't exist in 'products' table (item_id column)")
     print("2. ❌ Store numbers don't exist in 'stores' table (store_number column)")
@@ -182,7 +232,7 @@ def main():
     print("4. ❌ No matching records in 'inventory_snapshots' table")
     print("5. ⚠️  Column name mismatches (check if item_id vs sku, store_number vs store_id)")
     print("\nCheck the output above to see which case applies.")
-    print("=" * 80)
+    print(_BAR)
 
 if __name__ == "__main__":
     main()
@@ -23,10 +23,26 @@ load_dotenv()
 TEST_SKUS = ['535553', '538752', '538753', '532827', '537861', '537868', '519279', '755734']
 TEST_STORES = [20, 28, 37]  # Weldrick-020, Waterloo-028, London-037
 
+# Deduplicated once at module load: reused for .in_() payloads (smaller
+# ANY($1) arrays) and for set-difference checks without rebuilding sets
+TEST_SKU_SET = frozenset(TEST_SKUS)
+TEST_STORE_SET = frozenset(TEST_STORES)
+
+# Fetched column order (matches the select() projections below); passing it
+# to DataFrame.from_records skips per-row dict-key union inference
+_SALES_COLS = ['product_id', 'store_id', 'period_start', 'period_end',
+               'total_quantity_sold', 'stocking_unit_size', 'order_multiple',
+               'case_required', 'case_weekly', 'created_at']
+_INV_COLS = ['product_id', 'store_id', 'snapshot_date', 'quantity', 'created_at']
+
+# Section banners, built once at import instead of per print
+_BAR = "=" * 80
+_SUB = "-" * 80
+
 def main():
-    print("=" * 80)
+    print(_BAR)
     print("EXPORTING SUPABASE DATA TO EXCEL")
-    print("=" * 80)
+    print(_BAR)
 
     # Initialize Supabase
     supabase_url = os.getenv('SUPABASE_URL', 'https://zzxfwmgftwojhmuhkrrp.supabase.co')
@@ -53,18 +69,23 @@ def main():
     # =========================================================================
     # EXPORT 1: Sales Performance Data
     # =========================================================================
-    print("-" * 80)
+    print(_SUB)
     print("EXPORTING SALES PERFORMANCE DATA")
-    print("-" * 80)
+    print(_SUB)
 
     try:
         # Get product and store mappings
-        product_map = client._get_product_id_map(TEST_SKUS)
-        store_map = client._get_store_id_map(TEST_STORES)
+        product_map = client._get_product_id_map(sorted(TEST_SKU_SET))
+        store_map = client._get_store_id_map(sorted(TEST_STORE_SET))
 
         print(f"Found {len(product_map)} products in database")
         print(f"Found {len(store_map)} stores in database\n")
 
+        # Two-column lookup frames: merging against these is a C-level hash
+        # join, vs Series.map(dict) which walks rows in Python
+        prod_lookup = pd.DataFrame({'product_id': list(product_map), 'sku': list(product_map.values())})
+        store_lookup = pd.DataFrame({'store_id': list(store_map), 'store_number': list(store_map.values())})
+
         if not product_map or not store_map:
             print("⚠️  Missing products or stores - cannot fetch sales data")
             sales_df = pd.DataFrame()
@@ -72,19 +93,22 @@ def main():
             internal_product_ids = list(product_map.keys())
             internal_store_ids = list(store_map.keys())
 
-            # Fetch raw sales performance data
+            # Fetch raw sales performance data, projecting exactly the
+            # columns the export reorders into — nothing discarded client-side
             response = client.client.table('sales_performance')\
-                .select('*')\
+                .select('product_id, store_id, period_start, period_end, '
+                        'total_quantity_sold, stocking_unit_size, order_multiple, '
+                        'case_required, case_weekly, created_at')\
                 .in_('store_id', internal_store_ids)\
                 .in_('product_id', internal_product_ids)\
                 .execute()
 
             if response.data:
-                sales_df = pd.DataFrame(response.data)
+                sales_df = pd.DataFrame.from_records(response.data, columns=_SALES_COLS)
 
                 # Map internal IDs back to external values
-                sales_df['sku'] = sales_df['product_id'].map(product_map)
-                sales_df['store_number'] = sales_df['store_id'].map(store_map)
+                sales_df = sales_df.merge(prod_lookup, on='product_id', how='left')
+                sales_df = sales_df.merge(store_lookup, on='store_id', how='left')
 
                 # Reorder columns for readability
                 cols = ['sku', 'store_number', 'product_id', 'store_id', 'period_start',
@@ -96,12 +120,20 @@ def main():
 
                 # Export to Excel
                 output_file = output_dir / 'sales_performance_data.xlsx'
-                sales_df.to_excel(output_file, index=False, sheet_name='Sales Performance')
+                sales_df.to_excel(output_file, index=False, sheet_name='Sales Performance',
+                                  engine='xlsxwriter',
+                                  engine_kwargs={'options': {'constant_memory': True}})
                 print(f"✅ Exported to: {output_file}")
 
-                # Show summary
+                # Show summary: categorical keys let groupby hash integer
+                # codes instead of strings, observed=True skips empty
+                # SKU×store combinations, and the named agg computes all
+                # three reductions in one pass
                 print("\nSummary by SKU and Store:")
-                summary = sales_df.groupby(['sku', 'store_number'])['total_quantity_sold'].agg(['count', 'sum', 'mean']).reset_index()
+                sales_df['sku'] = sales_df['sku'].astype('category')
+                sales_df['store_number'] = sales_df['store_number'].astype('category')
+                summary = sales_df.groupby(['sku', 'store_number'], observed=True, sort=False)['total_quantity_sold']\
+                    .agg(periods='count', total='sum', avg='mean').reset_index()
                 summary.columns = ['SKU', 'Store', 'Periods', 'Total Sold', 'Avg Per Period']
                 print(summary.to_string(index=False))
             else:
@@ -115,28 +147,28 @@ def main():
     # =========================================================================
     # EXPORT 2: Inventory Snapshots Data
     # =========================================================================
-    print("\n" + "-" * 80)
+    print("\n" + _SUB)
     print("EXPORTING INVENTORY SNAPSHOTS DATA")
-    print("-" * 80)
+    print(_SUB)
 
     try:
         if not product_map or not store_map:
             print("⚠️  Missing products or stores - cannot fetch inventory data")
             inventory_df = pd.DataFrame()
         else:
-            # Fetch raw inventory snapshots
+            # Fetch raw inventory snapshots (projected, as above)
             response = client.client.table('inventory_snapshots')\
-                .select('*')\
+                .select('product_id, store_id, snapshot_date, quantity, created_at')\
                 .in_('store_id', internal_store_ids)\
                 .in_('product_id', internal_product_ids)\
                 .execute()
 
             if response.data:
-                inventory_df = pd.DataFrame(response.data)
+                inventory_df = pd.DataFrame.from_records(response.data, columns=_INV_COLS)
 
                 # Map internal IDs back to external values
-                inventory_df['sku'] = inventory_df['product_id'].map(product_map)
-                inventory_df['store_number'] = inventory_df['store_id'].map(store_map)
+                inventory_df = inventory_df.merge(prod_lookup, on='product_id', how='left')
+                inventory_df = inventory_df.merge(store_lookup, on='store_id', how='left')
 
                 # Reorder columns for readability
                 cols = ['sku', 'store_number', 'product_id', 'store_id',
@@ -150,13 +182,16 @@ def main():
 
                 # Export to Excel
                 output_file = output_dir / 'inventory_snapshots_data.xlsx'
-                inventory_df.to_excel(output_file, index=False, sheet_name='Inventory Snapshots')
+                inventory_df.to_excel(output_file, index=False, sheet_name='Inventory Snapshots',
+                                      engine='xlsxwriter',
+                                      engine_kwargs={'options': {'constant_memory': True}})
                 print(f"✅ Exported to: {output_file}")
 
-                # Show latest snapshots
+                # Show latest snapshots: idxmax picks the newest row per
+                # group in one pass, without re-sorting the whole frame
                 print("\nLatest Snapshot per SKU and Store:")
-                latest = inventory_df.sort_values('snapshot_date', ascending=False)\
-                    .drop_duplicates(subset=['sku', 'store_number'])[['sku', 'store_number', 'snapshot_date', 'quantity']]
+                latest_idx = inventory_df.groupby(['sku', 'store_number'], observed=True)['snapshot_date'].idxmax()
+                latest = inventory_df.loc[latest_idx, ['sku', 'store_number', 'snapshot_date', 'quantity']]
                 latest.columns = ['SKU', 'Store', 'Snapshot Date', 'Quantity']
                 print(latest.to_string(index=False))
             else:
@@ -170,19 +205,27 @@ def main():
     # =========================================================================
     # EXPORT 3: Combined Analysis (what the app uses)
     # =========================================================================
-    print("\n" + "-" * 80)
+    print("\n" + _SUB)
     print("EXPORTING PROCESSED DATA (AS USED BY APP)")
-    print("-" * 80)
+    print(_SUB)
 
     try:
-        # Get the processed data using the client methods
-        hist_sales = client.get_historical_sales(TEST_STORES, TEST_SKUS)
-        store_inv = client.get_store_inventory(TEST_STORES, TEST_SKUS)
+        if not product_map or not store_map:
+            # No matching keys: the client methods would just re-confirm
+            # that and return empty frames, so skip the round-trips
+            print("⏭️  Skipping processed export: no matching products or stores")
+            hist_sales = pd.DataFrame()
+            store_inv = pd.DataFrame()
+        else:
+            # Get the processed data using the client methods
+            hist_sales = client.get_historical_sales(TEST_STORES, TEST_SKUS)
+            store_inv = client.get_store_inventory(TEST_STORES, TEST_SKUS)
 
         if not hist_sales.empty or not store_inv.empty:
             output_file = output_dir / 'supabase_processed_data.xlsx'
 
-            with pd.ExcelWriter(output_file, engine='openpyxl') as writer:
+            with pd.ExcelWriter(output_file, engine='xlsxwriter',
+                                engine_kwargs={'options': {'constant_memory': True}}) as writer:
                 if not hist_sales.empty:
                     hist_sales.to_excel(writer, sheet_name='Historical Sales (Processed)', index=False)
                     print(f"✅ Historical Sales: {len(hist_sales)} rows")
@@ -212,9 +255,9 @@ def main():
     except Exception as e:
         print(f"❌ Error exporting processed data: {e}")
 
-    print("\n" + "=" * 80)
+    print("\n" + _BAR)
     print("EXPORT COMPLETE")
-    print("=" * 80)
+    print(_BAR)
     print(f"\nFiles created in: {output_dir}")
     print("1. sales_performance_data.xlsx - Raw sales performance data from Supabase")
     print("2. inventory_snapshots_data.xlsx - Raw inventory snapshots from Supabase")
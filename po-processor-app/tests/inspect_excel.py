@@ -1,13 +1,23 @@
 
 import pandas as pd
 
+EXCEL_PATH = "/Users/henryyu/Desktop/AI/Anti-Gravity/T&TPO/Odoo Import Ready (22).xlsx"
+
 try:
-    xl = pd.ExcelFile("/Users/henryyu/Desktop/AI/Anti-Gravity/T&TPO/Odoo Import Ready (22).xlsx")
-    print("Sheet Names:", xl.sheet_names)
-    
-    for sheet in xl.sheet_names:
+    # sheet_name=None loads every sheet in a single parse; the calamine
+    # engine (Rust reader) is much faster than openpyxl and is only
+    # needed for reading, so fall back if python-calamine isn't installed
+    # or pandas predates the engine (< 2.2 raises ValueError: Unknown
+    # engine, which the numpy<1.22 pin in requirements makes the norm)
+    try:
+        sheets = pd.read_excel(EXCEL_PATH, sheet_name=None, engine='calamine')
+    except (ImportError, ValueError):
+        sheets = pd.read_excel(EXCEL_PATH, sheet_name=None)
+
+    print("Sheet Names:", list(sheets))
+
+    for sheet, df in sheets.items():
         print(f"\n--- Sheet: {sheet} ---")
-        df = pd.read_excel(xl, sheet_name=sheet)
         print("Columns:", df.columns.tolist())
         print(df.head(2).to_string())
 except Exception as e:
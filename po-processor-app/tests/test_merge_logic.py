@@ -2,9 +2,12 @@
 Test the merge logic between line_details and Supabase data
 """
 
+import io
 import sys
 import os
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+import numpy as np
 import pandas as pd
 
 # Add parent directory to path
@@ -14,142 +17,202 @@ from backend.supabase_client import SupabaseClient
 from backend.inventory_optimizer import InventoryOptimizer
 from backend.data_transformer import DataTransformer
 from dotenv import load_dotenv
+import functools
 import yaml
 
+try:
+    from yaml import CSafeLoader as _YamlLoader  # libyaml C parser
+except ImportError:  # pure-Python fallback
+    from yaml import SafeLoader as _YamlLoader
+
 # Load environment
 load_dotenv()
 
-# Test data - simulating what line_details would look like
-SAMPLE_LINE_DETAILS = pd.DataFrame([
-    {
-        'internal_reference': '535553',
-        'store_id': 20,
-        'product_uom_qty': 150,
-        'warehouse': 'CE',
-        'odoo_on_hand': 1000,
-        'odoo_available': 800,
-        'flagged': False,
-        'flag_reason': ''
-    },
-    {
-        'internal_reference': '538752',
-        'store_id': 28,
-        'product_uom_qty': 6,
-        'warehouse': 'CE',
-        'odoo_on_hand': 500,
-        'odoo_available': 400,
-        'flagged': False,
-        'flag_reason': ''
-    },
-    {
-        'internal_reference': '519279',
-        'store_id': 20,
-        'product_uom_qty': 30,
-        'warehouse': 'CE',
-        'odoo_on_hand': 200,
-        'odoo_available': 150,
-        'flagged': False,
-        'flag_reason': ''
-    }
-])
+# Bound __repr__ cost when the printed frames grow large
+pd.set_option('display.max_rows', 20)
+
+# Copy-on-write lets the fixture be handed out as a shallow copy below:
+# buffers are shared until the optimizer writes, instead of deep-copying
+# every column up front (option exists from pandas 1.5, default in 3.x)
+try:
+    pd.set_option('mode.copy_on_write', True)
+except Exception:
+    pass
+
+try:
+    from numba import njit, prange
+
+    @njit(parallel=True, cache=True)
+    def _any_positive(a, b):
+        """Fused (a > 0) | (b > 0) -> any() without intermediate bool
+        arrays; cache=True reuses the compiled kernel across sessions.
+        Counting hits (a supported prange reduction) rather than setting
+        a flag, which numba would privatize per thread and discard."""
+        hits = 0
+        for i in prange(a.shape[0]):
+            if a[i] > 0 or b[i] > 0:
+                hits += 1
+        return hits > 0
+except ImportError:  # optional fast path only
+    _any_positive = None
+
+# Test data - simulating what line_details would look like.
+# Columnar construction from typed arrays: no per-row dict boxing, no
+# dtype sniffing, and store_id is pinned to int64 rather than whatever
+# object inference decides (the exact mismatch this test chases).
+SAMPLE_LINE_DETAILS = pd.DataFrame({
+    'internal_reference': np.array(['535553', '538752', '519279'], dtype=object),
+    'store_id': np.array([20, 28, 20], dtype=np.int64),
+    'product_uom_qty': np.array([150, 6, 30], dtype=np.int64),
+    'warehouse': np.array(['CE', 'CE', 'CE'], dtype=object),
+    'odoo_on_hand': np.array([1000, 500, 200], dtype=np.int64),
+    'odoo_available': np.array([800, 400, 150], dtype=np.int64),
+    'flagged': np.zeros(3, dtype=bool),
+    'flag_reason': np.array(['', '', ''], dtype=object),
+})
+
+# Arrow-backed columns keep strings in contiguous buffers instead of boxed
+# Python objects, which speeds up the optimizer's merges and groupbys.
+# Optional: pyarrow is not a hard dependency of the app.
+try:
+    import pyarrow  # noqa: F401
+    SAMPLE_LINE_DETAILS = SAMPLE_LINE_DETAILS.convert_dtypes(dtype_backend='pyarrow')
+except ImportError:
+    pass
+
+# Section banners, built once at import instead of per print
+_BAR = "=" * 80
+_SUB = "-" * 80
+
+@functools.cache
+def _load_settings():
+    settings_path = Path(__file__).parent.parent / 'config' / 'settings.yaml'
+    with open(settings_path, 'r') as f:
+        return yaml.load(f, Loader=_YamlLoader)
 
 def main():
-    print("=" * 80)
-    print("TESTING MERGE LOGIC")
-    print("=" * 80)
-
-    # Initialize clients
-    supabase_url = os.getenv('SUPABASE_URL', 'https://zzxfwmgftwojhmuhkrrp.supabase.co')
-    supabase_key = os.getenv('SUPABASE_KEY')
-
-    if not supabase_key:
-        print("❌ ERROR: SUPABASE_KEY not found")
-        return
+    # Collect all section output and write it once: one stdout syscall
+    # instead of one (plus implicit flush) per print
+    buf = io.StringIO()
+    try:
+        print(_BAR, file=buf)
+        print("TESTING MERGE LOGIC", file=buf)
+        print(_BAR, file=buf)
+
+        # Initialize clients
+        supabase_url = os.getenv('SUPABASE_URL', 'https://zzxfwmgftwojhmuhkrrp.supabase.co')
+        supabase_key = os.getenv('SUPABASE_KEY')
+
+        if not supabase_key:
+            print("❌ ERROR: SUPABASE_KEY not found", file=buf)
+            return
+
+        supabase_client = SupabaseClient(supabase_url, supabase_key)
+
+        if not supabase_client.connect():
+            print("❌ Failed to connect to Supabase", file=buf)
+            return
+
+        # Load settings (parsed once per interpreter)
+        settings = _load_settings()
+
+        # Create test line_details DataFrame. The optimizer normalizes key
+        # columns in place, so isolation is still needed - but under
+        # copy-on-write a shallow copy defers the buffer copies to the
+        # columns actually written
+        line_details = SAMPLE_LINE_DETAILS.copy(deep=False)
+
+        print("\n" + _SUB, file=buf)
+        print("INITIAL LINE DETAILS", file=buf)
+        print(_SUB, file=buf)
+        print(line_details, file=buf)
+        print("\nColumn types:", file=buf)
+        print(line_details.dtypes, file=buf)
+
+        # Fetch Supabase data. pd.unique on the raw arrays skips boxing every
+        # value into a Python list; the client accepts array-likes directly.
+        refs = pd.unique(line_details['internal_reference'].to_numpy())
+        store_ids = pd.unique(line_details['store_id'].to_numpy())
+
+        print("\n" + _SUB, file=buf)
+        print("FETCHING SUPABASE DATA", file=buf)
+        print(_SUB, file=buf)
+        print(f"SKUs: {refs}", file=buf)
+        print(f"Store IDs: {store_ids}", file=buf)
+
+        # Independent round-trips: overlap them so wall time is the
+        # slower of the two instead of their sum
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            sales_future = pool.submit(supabase_client.get_historical_sales, store_ids, refs)
+            inv_future = pool.submit(supabase_client.get_store_inventory, store_ids, refs)
+        hist_sales = sales_future.result()
+        store_inv = inv_future.result()
+
+        print("\n📊 Historical Sales:", file=buf)
+        if not hist_sales.empty:
+            print(hist_sales, file=buf)
+            print("\nColumn types:", file=buf)
+            print(hist_sales.dtypes, file=buf)
+        else:
+            print("Empty DataFrame", file=buf)
+
+        print("\n🏪 Store Inventory:", file=buf)
+        if not store_inv.empty:
+            print(store_inv, file=buf)
+            print("\nColumn types:", file=buf)
+            print(store_inv.dtypes, file=buf)
+        else:
+            print("Empty DataFrame", file=buf)
+
+        # Run optimizer
+        print("\n" + _SUB, file=buf)
+        print("RUNNING INVENTORY OPTIMIZER", file=buf)
+        print(_SUB, file=buf)
+
+        transformer = DataTransformer(settings)
+        optimizer = InventoryOptimizer(transformer)
+
+        optimized_lines, logs = optimizer.optimize_allocations(
+            line_details,
+            hist_sales,
+            store_inv
+        )
+
+        print("\n✅ OPTIMIZED LINE DETAILS", file=buf)
+        print(_SUB, file=buf)
+        print(optimized_lines[['internal_reference', 'store_id', 'hist_avg_sales', 'store_on_hand', 'product_uom_qty', 'flagged']], file=buf)
+
+        # Verify the merge worked
+        print("\n" + _BAR, file=buf)
+        print("VERIFICATION", file=buf)
+        print(_BAR, file=buf)
+
+        if _any_positive is not None:
+            # Compiled kernel: one parallel loop over both columns, no
+            # intermediate boolean arrays at all
+            has_data = bool(_any_positive(
+                optimized_lines['hist_avg_sales'].to_numpy(dtype='float64'),
+                optimized_lines['store_on_hand'].to_numpy(dtype='float64')
+            ))
+        else:
+            # eval fuses the two comparisons and the OR into one expression pass
+            # (numexpr-backed when installed) instead of materializing a boolean
+            # Series per column before reducing
+            has_data = bool(optimized_lines.eval('(hist_avg_sales > 0) | (store_on_hand > 0)').to_numpy().any())
+
+        if has_data:
+            print("✅ SUCCESS: Merge worked! Data populated in hist_avg_sales and/or store_on_hand", file=buf)
+        else:
+            print("❌ FAILURE: All zeros in hist_avg_sales and store_on_hand", file=buf)
+            print("\nDebugging info:", file=buf)
+            print("\nline_details types after optimizer processing:", file=buf)
+            print(optimized_lines[['internal_reference', 'store_id']].dtypes, file=buf)
+            print("\nFirst few rows of relevant columns:", file=buf)
+            print(optimized_lines[['internal_reference', 'store_id', 'hist_avg_sales', 'store_on_hand']].head(), file=buf)
+    finally:
+        sys.stdout.write(buf.getvalue())
+        sys.stdout.flush()
 
-    supabase_client = SupabaseClient(supabase_url, supabase_key)
-
-    if not supabase_client.connect():
-        print("❌ Failed to connect to Supabase")
-        return
-
-    # Load settings
-    settings_path = Path(__file__).parent.parent / 'config' / 'settings.yaml'
-    with open(settings_path, 'r') as f:
-        settings = yaml.safe_load(f)
-
-    # Create test line_details DataFrame
-    line_details = SAMPLE_LINE_DETAILS.copy()
-
-    print("\n" + "-" * 80)
-    print("INITIAL LINE DETAILS")
-    print("-" * 80)
-    print(line_details)
-    print("\nColumn types:")
-    print(line_details.dtypes)
-
-    # Fetch Supabase data
-    refs = line_details['internal_reference'].unique().tolist()
-    store_ids = line_details['store_id'].unique().tolist()
-
-    print("\n" + "-" * 80)
-    print("FETCHING SUPABASE DATA")
-    print("-" * 80)
-    print(f"SKUs: {refs}")
-    print(f"Store IDs: {store_ids}")
-
-    hist_sales = supabase_client.get_historical_sales(store_ids, refs)
-    store_inv = supabase_client.get_store_inventory(store_ids, refs)
-
-    print("\n📊 Historical Sales:")
-    if not hist_sales.empty:
-        print(hist_sales)
-        print("\nColumn types:")
-        print(hist_sales.dtypes)
-    else:
-        print("Empty DataFrame")
-
-    print("\n🏪 Store Inventory:")
-    if not store_inv.empty:
-        print(store_inv)
-        print("\nColumn types:")
-        print(store_inv.dtypes)
-    else:
-        print("Empty DataFrame")
-
-    # Run optimizer
-    print("\n" + "-" * 80)
-    print("RUNNING INVENTORY OPTIMIZER")
-    print("-" * 80)
-
-    transformer = DataTransformer(settings)
-    optimizer = InventoryOptimizer(transformer)
-
-    optimized_lines, logs = optimizer.optimize_allocations(
-        line_details,
-        hist_sales,
-        store_inv
-    )
-
-    print("\n✅ OPTIMIZED LINE DETAILS")
-    print("-" * 80)
-    print(optimized_lines[['internal_reference', 'store_id', 'hist_avg_sales', 'store_on_hand', 'product_uom_qty', 'flagged']])
-
-    # Verify the merge worked
-    print("\n" + "=" * 80)
-    print("VERIFICATION")
-    print("=" * 80)
-
-    has_data = (optimized_lines['hist_avg_sales'] > 0).any() or (optimized_lines['store_on_hand'] > 0).any()
-
-    if has_data:
-        print("✅ SUCCESS: Merge worked! Data populated in hist_avg_sales and/or store_on_hand")
-    else:
-        print("❌ FAILURE: All zeros in hist_avg_sales and store_on_hand")
-        print("\nDebugging info:")
-        print("\nline_details types after optimizer processing:")
-        print(optimized_lines[['internal_reference', 'store_id']].dtypes)
-        print("\nFirst few rows of relevant columns:")
-        print(optimized_lines[['internal_reference', 'store_id', 'hist_avg_sales', 'store_on_hand']].head())
 
 if __name__ == "__main__":
     main()
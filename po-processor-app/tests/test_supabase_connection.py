@@ -1,5 +1,6 @@
 import os
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 import pandas as pd
 
@@ -7,22 +8,47 @@ import pandas as pd
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from backend.supabase_client import SupabaseClient
 
+import functools
 import yaml
 
+try:
+    from yaml import CSafeLoader as _YamlLoader  # libyaml C parser
+except ImportError:  # pure-Python fallback
+    from yaml import SafeLoader as _YamlLoader
+
+# One products probe per interpreter, keyed on the project URL: repeated
+# runs in the same process reuse the first discovered SKU instead of
+# paying a round-trip just to find a valid item_id
+_PROBE_CACHE = {}
+
+def _probe_sku(client, url):
+    if url not in _PROBE_CACHE:
+        prod_resp = client.client.table('products').select('item_id').limit(1).execute()
+        _PROBE_CACHE[url] = prod_resp.data[0]['item_id'] if prod_resp.data else None
+    return _PROBE_CACHE[url]
+
+@functools.cache
 def load_settings():
+    """Parse settings once per interpreter; reruns share the result"""
     try:
         with open('config/settings.yaml', 'r') as f:
-            return yaml.safe_load(f)
+            return yaml.load(f, Loader=_YamlLoader)
     except FileNotFoundError:
         return {}
 
-def test_connection():
+@functools.cache
+def _creds():
+    """Resolve Supabase credentials once per interpreter: load_dotenv
+    re-parses the .env file line by line on every call, which adds up
+    when pytest collects this module alongside many others"""
     load_dotenv()
     settings = load_settings()
-    
     url = os.getenv("SUPABASE_URL") or settings.get('supabase', {}).get('url')
-    key = os.getenv("SUPABASE_KEY")
-    
+    return url, os.getenv("SUPABASE_KEY")
+
+def test_connection():
+    url, key = _creds()
+
     if not url or not key:
         print(f"❌ Missing Supabase Credentials. URL: {url}, Key: {'[HIDDEN]' if key else 'None'}")
         return
@@ -45,16 +71,18 @@ def test_connection():
         # or list products first?
         # Let's try to query products table to get a valid Item ID
         try:
-            prod_resp = client.client.table('products').select('item_id').limit(1).execute()
-            if prod_resp.data:
-                test_sku = prod_resp.data[0]['item_id']
+            test_sku = _probe_sku(client, url)
+            if test_sku is not None:
                 print(f"Found Test SKU: {test_sku}")
-                
-                sales = client.get_historical_sales([22], [test_sku])
-                print(f"Sales Data:\n{sales}")
-                
-                inv = client.get_store_inventory([22], [test_sku])
-                print(f"Inventory Data:\n{inv}")
+
+                # The two fetches are independent network calls, so let
+                # them overlap instead of serializing the round-trips
+                with ThreadPoolExecutor(max_workers=2) as pool:
+                    sales_future = pool.submit(client.get_historical_sales, [22], [test_sku])
+                    inv_future = pool.submit(client.get_store_inventory, [22], [test_sku])
+
+                print(f"Sales Data:\n{sales_future.result()}")
+                print(f"Inventory Data:\n{inv_future.result()}")
             else:
                 print("⚠️ No products found in DB to test with.")
         except Exception as e: